@@ -4,9 +4,12 @@ import pymongo
 import openai
 import webbrowser
 import hashlib
+import os
 import plotly.express as px
 from streamlit_option_menu import option_menu
 import time
+import export
+import partitions
 
 # ===== Page Configurations =====
 st.set_page_config(page_title="🌍 Tourist HotSpot Finder", layout="wide")
@@ -23,9 +26,10 @@ except pymongo.errors.ConnectionFailure as e:
     st.stop()
 
 # ===== Load Dataset =====
+DATA_PATH = "updated_tourist_places_dataset.csv"
+
 @st.cache_data
 def load_dataset():
-    DATA_PATH = "updated_tourist_places_dataset.csv"
     try:
         df = pd.read_csv(DATA_PATH)
         # Remove rows with missing critical fields
@@ -35,6 +39,38 @@ def load_dataset():
         st.error(f"Dataset file not found at {DATA_PATH}. Please check the file path.")
         return pd.DataFrame()
 
+@st.cache_resource(max_entries=1)
+def _partition_store(source_signature, shard_index, shard_count, cache_mb):
+    # source_signature is only part of the cache key, so a changed DATA_PATH
+    # file rebuilds the partitions and replaces the cached store.
+    out_dir = partitions.shard_dir(partitions.PARTITION_DIR, shard_index, shard_count)
+    partitions.ensure_partitions(DATA_PATH, out_dir, shard_index=shard_index, shard_count=shard_count)
+    return partitions.PartitionStore(out_dir, max_bytes=cache_mb * 1024 * 1024,
+                                     shard_index=shard_index, shard_count=shard_count)
+
+def get_partition_store():
+    # Set PARTITION_SHARD/PARTITION_SHARDS to serve a disjoint set of countries.
+    try:
+        shard_index = int(os.environ.get("PARTITION_SHARD", "0"))
+        shard_count = int(os.environ.get("PARTITION_SHARDS", "1"))
+        cache_mb = int(os.environ.get("PARTITION_CACHE_MB", "256"))
+        partitions.validate_shard(shard_index, shard_count)
+        if cache_mb <= 0:
+            raise ValueError("PARTITION_CACHE_MB must be positive.")
+    except ValueError as e:
+        st.error(f"Invalid partition settings: {e}")
+        return None
+    try:
+        signature = partitions.source_signature(DATA_PATH)
+    except FileNotFoundError:
+        st.error(f"Dataset file not found at {DATA_PATH}. Please check the file path.")
+        return None
+    try:
+        return _partition_store((signature["size"], signature["mtime"]), shard_index, shard_count, cache_mb)
+    except (OSError, ValueError, RuntimeError) as e:
+        st.error(f"Could not load the partitioned dataset: {e}")
+        return None
+
 # ===== OpenAI API Key for Chatbot =====
 OPENAI_API_KEY = "your-openai-api-key"
 openai.api_key = OPENAI_API_KEY
@@ -224,6 +260,73 @@ def local_css():
 
 local_css()
 
+# ===== Report Export =====
+def export_panel(key, make_chunks, name, total_rows=None, scope=None, formats=export.STREAMING_FORMATS,
+                 transform=None):
+    """Let the user export a result set and follow its background progress.
+
+    make_chunks is only called when the export starts and should return a
+    lazy chunk source from the export module, so nothing is built up front.
+    scope identifies the result set (e.g. the selected country); a finished
+    job from a different scope is discarded instead of being shown.
+    """
+    if "export_jobs" not in st.session_state:
+        st.session_state.export_jobs = {}
+    job = st.session_state.export_jobs.get(key)
+    if job is not None and job.scope != scope:
+        discard_export(key)
+        job = None
+
+    cols = st.columns([2, 1])
+    with cols[0]:
+        fmt = st.selectbox("📤 Export Format", formats, key=f"export_format_{key}")
+    with cols[1]:
+        st.write("")
+        busy = job is not None and not job.done
+        if st.button("📤 Export", key=f"export_button_{key}", disabled=busy):
+            discard_export(key)
+            try:
+                job = export.start_export(make_chunks(), fmt, name, total_rows, scope, transform)
+            except ValueError as e:
+                st.error(str(e))
+                return
+            st.session_state.export_jobs[key] = job
+
+    if job is None:
+        return
+    if not job.done:
+        _export_progress(job)
+    elif job.error is not None:
+        st.error(f"Export failed: {job.error}")
+    elif os.path.exists(job.path):
+        export.start_download_server()
+        st.markdown(f'<a href="{job.url(export_base_url())}" download="{job.file_name}">'
+                    f'⬇ Download {job.file_name}</a>', unsafe_allow_html=True)
+    else:
+        st.info("This export has expired. Please export again.")
+
+def export_base_url():
+    # EXPORT_BASE_URL overrides this when the download server sits behind a
+    # proxy; otherwise it is reached on the host the browser used for the app.
+    if os.environ.get("EXPORT_BASE_URL"):
+        return os.environ["EXPORT_BASE_URL"]
+    host = st.context.headers.get("Host", "localhost").rsplit(":", 1)[0]
+    return f"http://{host}:{export.EXPORT_PORT}"
+
+def discard_export(key):
+    job = st.session_state.get("export_jobs", {}).pop(key, None)
+    if job is not None:
+        job.discard()
+
+@st.fragment(run_every=1)
+def _export_progress(job):
+    # Only this fragment reruns while the worker writes; once the job is done
+    # the full page reruns so export_panel can show the download link.
+    if job.done:
+        st.rerun()
+    st.progress(job.progress,
+                text=f"Exporting {job.format}... {job.rows_read} rows read, {job.rows_written} rows written")
+
 # ===== Main Application Logic =====
 def main_app():
     # Apply main app background
@@ -259,8 +362,8 @@ def main_app():
     # Search Places Page
     elif selected_page == "🔍 Search Places":
         st.title("🔍 Search Places")
-        df = load_dataset()
-        if df.empty: return
+        store = get_partition_store()
+        if store is None: return
 
         # Initialize session state
         if "search_results" not in st.session_state:
@@ -277,8 +380,7 @@ def main_app():
             st.session_state.selected_category = ""
 
         # Input fields
-        countries = df["Country"].dropna().unique().tolist()
-        countries = [""] + sorted(countries)
+        countries = [""] + store.countries()
         country = st.selectbox("🌍 Select Country", countries, 
                                index=countries.index(st.session_state.selected_country) if st.session_state.selected_country in countries else 0,
                                key="country_select", help="Choose a country to filter states and cities")
@@ -291,8 +393,7 @@ def main_app():
 
         states = []
         if country:
-            states = df[df["Country"] == country]["State"].dropna().unique().tolist()
-            states = [""] + sorted(states)
+            states = [""] + store.states(country)
         state = st.selectbox("🏙 Select State", states, 
                              index=states.index(st.session_state.selected_state) if st.session_state.selected_state in states else 0,
                              key="state_select", help="Choose a state to filter cities") if states else None
@@ -304,7 +405,8 @@ def main_app():
 
         cities = []
         if state:
-            cities = df[(df["Country"] == country) & (df["State"] == state)]["City"].dropna().unique().tolist()
+            state_df = store.load(country, state)
+            cities = state_df["City"].dropna().unique().tolist()
             cities = [""] + sorted(cities)
         city = st.selectbox("🏞 Select City", cities, 
                             index=cities.index(st.session_state.selected_city) if st.session_state.selected_city in cities else 0,
@@ -320,16 +422,24 @@ def main_app():
 
         if st.button("🔍 Search", disabled=not (country and state and city)):
             if country and state and city:
-                results = df[(df["Country"] == country) & (df["State"] == state) & (df["City"] == city)]
+                state_df = store.load(country, state)
+                results = state_df[state_df["City"] == city]
                 if category_input:
                     results = results[results["Tourist Place"].str.contains(category_input, case=False, na=False)]
                 st.session_state.search_results = results
+                st.session_state.search_scope = (country, state, city, category_input)
                 st.session_state.selected_place = None
                 if "place_selector" in st.session_state:
                     del st.session_state.place_selector
             else:
                 st.warning("⚠ Please select a country, state, and city to search.")
 
+        if country:
+            with st.expander(f"📤 Export all places in {country}"):
+                paths = store.paths(country)
+                export_panel("country_places", lambda: (chunk for path in paths for chunk in export.iter_csv(path)),
+                             f"places_{country}", total_rows=store.rows(country), scope=country)
+
         if st.button("🔄 Reset Search"):
             st.session_state.search_results = pd.DataFrame()
             st.session_state.selected_place = None
@@ -339,10 +449,16 @@ def main_app():
             st.session_state.selected_category = ""
             if "place_selector" in st.session_state:
                 del st.session_state.place_selector
+            discard_export("search_results")
+            discard_export("country_places")
             st.rerun()
 
         if not st.session_state.search_results.empty:
             st.success(f"✅ Found {len(st.session_state.search_results)} places in {city}!")
+            results = st.session_state.search_results
+            export_panel("search_results", lambda: export.iter_frame(results),
+                         f"search_{city}", total_rows=len(results),
+                         scope=st.session_state.get("search_scope"), formats=list(export.EXPORT_FORMATS))
             place_options = st.session_state.search_results["Tourist Place"].tolist()
             selected_place = st.selectbox("📍 Select a Place", place_options, key="place_selector")
 
@@ -398,6 +514,11 @@ def main_app():
         
         if saved_places:
             st.info(f"You have saved {len(saved_places)} place(s).")
+            username = st.session_state['username']
+            export_panel("saved_places",
+                         lambda: export.iter_cursor(places_collection.find({"saved_by": username}, {"_id": 0})),
+                         f"saved_{username}", total_rows=len(saved_places),
+                         scope=username, formats=list(export.EXPORT_FORMATS))
             for place in saved_places:
                 delete_key = f"delete_{place['Tourist Place']}_{st.session_state['username']}"
                 st.markdown(f"""
@@ -463,6 +584,15 @@ def main_app():
         top_places = df.sort_values(by="Reviews", ascending=False).head(5)
         st.table(top_places[["Tourist Place", "Country", "City", "Reviews"]])
 
+        st.markdown("---")
+        st.write("### 📤 Export Reports")
+        st.write("Hotspot summary: number of places and average rating for every city.")
+        export_panel("hotspot_summary", lambda: export.iter_csv(DATA_PATH), "hotspot_summary",
+                     total_rows=len(df), formats=list(export.EXPORT_FORMATS),
+                     transform=export.iter_hotspot_summary)
+        st.write("All tourist places in the dataset.")
+        export_panel("all_places", lambda: export.iter_csv(DATA_PATH), "all_places", total_rows=len(df))
+
     # Chatbot Page
     elif selected_page == "🤖 Chatbot":
         st.markdown("<h2 style='text-align: center;'>🤖 Travel Chatbot</h2>", unsafe_allow_html=True)
@@ -0,0 +1,346 @@
+import os
+import time
+import uuid
+import shutil
+import tempfile
+import threading
+from urllib.parse import unquote
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+from partitions import REQUIRED_COLUMNS, slug
+
+# ===== Export Settings =====
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "tourist_hotspot_exports")
+EXPORT_MAX_AGE = 60 * 60
+CHUNK_SIZE = 5000
+
+# Finished files are downloaded from a small file server running next to the
+# app. It streams them from disk, so the script thread never reads them and
+# there is no size limit.
+EXPORT_HOST = os.environ.get("EXPORT_HOST", "0.0.0.0")
+EXPORT_PORT = int(os.environ.get("EXPORT_PORT", "8502"))
+
+# Columns parsed as numbers when streaming a CSV; everything else is read as
+# text so that every chunk has the same column types.
+NUMERIC_COLUMNS = ["Reviews"]
+
+# python-docx holds the whole document in memory until it is saved, so DOCX
+# is only offered for bounded result sets and refused above this many rows.
+DOCX_MAX_ROWS = 2000
+
+# Format name -> (file extension, download MIME type)
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "DOCX": (".docx", "application/vnd.openxmlformats-officedocument.wordprocessingml.document"),
+}
+STREAMING_FORMATS = ["CSV", "Parquet"]
+
+SUMMARY_KEYS = ["Country", "State", "City"]
+
+# A small worker pool keeps exports off the Streamlit script thread without
+# letting many concurrent exports compete for disk and memory.
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="export")
+
+
+# ===== Chunk Sources =====
+def iter_frame(df, chunk_size=CHUNK_SIZE):
+    """Yield an in-memory DataFrame in slices of chunk_size rows."""
+    for start in range(0, len(df), chunk_size):
+        yield df.iloc[start:start + chunk_size]
+
+
+def iter_csv(path, chunk_size=CHUNK_SIZE):
+    """Stream a CSV file in chunks with the same column types in every chunk."""
+    for chunk in pd.read_csv(path, chunksize=chunk_size, dtype=str):
+        chunk = chunk.dropna(subset=REQUIRED_COLUMNS)
+        for column in NUMERIC_COLUMNS:
+            if column in chunk:
+                chunk[column] = pd.to_numeric(chunk[column], errors="coerce")
+        if not chunk.empty:
+            yield chunk
+
+
+def iter_cursor(cursor, chunk_size=CHUNK_SIZE):
+    """Batch documents from a MongoDB cursor into DataFrame chunks."""
+    batch = []
+    for doc in cursor:
+        doc.pop("_id", None)
+        batch.append(doc)
+        if len(batch) >= chunk_size:
+            yield pd.DataFrame(batch)
+            batch = []
+    if batch:
+        yield pd.DataFrame(batch)
+
+
+def iter_hotspot_summary(chunks):
+    """Aggregate place counts and ratings per city across all chunks.
+
+    Only the running per-city totals are kept in memory, so the input can
+    be the full global dataset. Pass it to start_export as a transform so
+    that reading the input reports progress and can be cancelled.
+    """
+    totals = None
+    for chunk in chunks:
+        reviews = pd.to_numeric(chunk["Reviews"], errors="coerce")
+        part = chunk.assign(Reviews=reviews).groupby(SUMMARY_KEYS).agg(
+            Places=("Tourist Place", "count"),
+            RatingSum=("Reviews", "sum"),
+            RatingCount=("Reviews", "count"),
+        )
+        totals = part if totals is None else totals.add(part, fill_value=0)
+    if totals is None:
+        return
+    totals["Average Rating"] = (totals["RatingSum"] / totals["RatingCount"]).round(2)
+    summary = totals.drop(columns=["RatingSum", "RatingCount"]).reset_index()
+    summary["Places"] = summary["Places"].astype(int)
+    summary = summary.sort_values(by="Places", ascending=False)
+    yield from iter_frame(summary)
+
+
+# ===== Chunk Writers =====
+def _write_csv(chunks, path, on_chunk):
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(path, mode="w" if header else "a", header=header, index=False)
+        header = False
+        on_chunk(len(chunk))
+    if header:
+        pd.DataFrame().to_csv(path, index=False)
+
+
+def _conform(chunk, schema):
+    # Sources such as Mongo batches infer types per chunk, so cast every
+    # chunk to the schema taken from the first one before writing it.
+    import pyarrow as pa
+
+    chunk = chunk.reindex(columns=schema.names)
+    for field in schema:
+        column = chunk[field.name]
+        if pa.types.is_string(field.type):
+            chunk[field.name] = column.map(lambda v: None if pd.isna(v) else str(v)).astype(object)
+        elif pa.types.is_floating(field.type):
+            chunk[field.name] = pd.to_numeric(column, errors="coerce").astype("float64")
+    return chunk
+
+
+def _write_parquet(chunks, path, on_chunk):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    schema = None
+    try:
+        for chunk in chunks:
+            if schema is None:
+                # Columns that are all-null in the first chunk have no type
+                # yet, so they are stored as strings; integers are widened to
+                # floats so later chunks with NaN or fractions still fit.
+                schema = pa.Schema.from_pandas(chunk, preserve_index=False)
+                schema = pa.schema([
+                    f.with_type(pa.string()) if pa.types.is_null(f.type)
+                    else f.with_type(pa.float64()) if pa.types.is_integer(f.type)
+                    else f
+                    for f in schema
+                ])
+                writer = pq.ParquetWriter(path, schema)
+            table = pa.Table.from_pandas(_conform(chunk, schema), schema=schema, preserve_index=False)
+            writer.write_table(table)
+            on_chunk(len(chunk))
+    finally:
+        if writer is not None:
+            writer.close()
+    if writer is None:
+        pq.write_table(pa.table({}), path)
+
+
+def _write_docx(chunks, path, on_chunk, title="Tourist Places Export"):
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(title, level=1)
+    table = None
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        if rows > DOCX_MAX_ROWS:
+            raise ValueError(f"DOCX export is limited to {DOCX_MAX_ROWS} rows; use CSV or Parquet instead.")
+        if table is None:
+            table = doc.add_table(rows=1, cols=len(chunk.columns))
+            table.style = "Table Grid"
+            for cell, column in zip(table.rows[0].cells, chunk.columns):
+                cell.text = str(column)
+        for row in chunk.itertuples(index=False):
+            cells = table.add_row().cells
+            for cell, value in zip(cells, row):
+                cell.text = "" if pd.isna(value) else str(value)
+        on_chunk(len(chunk))
+    if table is None:
+        doc.add_paragraph("No records to export.")
+    doc.save(path)
+
+
+WRITERS = {
+    "CSV": _write_csv,
+    "Parquet": _write_parquet,
+    "DOCX": _write_docx,
+}
+
+
+# ===== Background Export Jobs =====
+class ExportJob:
+    """Progress and result of one export running on the worker pool."""
+
+    def __init__(self, name, fmt, total_rows=None, scope=None):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.format = fmt
+        self.total_rows = total_rows
+        self.scope = scope
+        self.rows_read = 0
+        self.rows_written = 0
+        self.file_name = f"{slug(name) or 'export'}_{self.id}{EXPORT_FORMATS[fmt][0]}"
+        self.path = os.path.join(EXPORT_DIR, self.file_name)
+        self.error = None
+        self.future = None
+        self.cancelled = False
+        self._lock = threading.Lock()
+
+    def _check_cancelled(self):
+        if self.cancelled:
+            raise RuntimeError("Export was cancelled.")
+
+    def _read(self, chunks):
+        # Counts rows as they are taken from the source, which is where a
+        # transform such as iter_hotspot_summary spends its time.
+        for chunk in chunks:
+            self._check_cancelled()
+            with self._lock:
+                self.rows_read += len(chunk)
+            yield chunk
+
+    def _advance(self, rows):
+        self._check_cancelled()
+        with self._lock:
+            self.rows_written += rows
+
+    def discard(self):
+        """Stop the export if it is queued or running and delete its file."""
+        self.cancelled = True
+        if self.future is not None:
+            self.future.cancel()
+        if self.done and os.path.exists(self.path):
+            os.remove(self.path)
+
+    @property
+    def done(self):
+        return self.future is not None and self.future.done()
+
+    @property
+    def progress(self):
+        """Fraction complete in [0, 1]; unknown totals report 0 until done."""
+        if self.done:
+            return 1.0
+        if not self.total_rows:
+            return 0.0
+        return min(self.rows_read / self.total_rows, 1.0)
+
+    def url(self, base_url):
+        return f"{base_url.rstrip('/')}/{self.file_name}"
+
+
+def _run(job, chunks, transform):
+    if job.cancelled:
+        return
+    try:
+        chunks = job._read(chunks)
+        if transform is not None:
+            chunks = transform(chunks)
+        WRITERS[job.format](chunks, job.path, job._advance)
+    except Exception as e:
+        job.error = e
+    if (job.error is not None or job.cancelled) and os.path.exists(job.path):
+        os.remove(job.path)
+
+
+def prune_exports(max_age=EXPORT_MAX_AGE):
+    """Delete export files older than max_age seconds."""
+    if not os.path.isdir(EXPORT_DIR):
+        return
+    cutoff = time.time() - max_age
+    for entry in os.scandir(EXPORT_DIR):
+        try:
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+
+
+def start_export(chunks, fmt, name, total_rows=None, scope=None, transform=None):
+    """Write chunks to a file of the given format on a background thread.
+
+    chunks is consumed lazily by the worker, so sources such as iter_csv or
+    iter_cursor are only read as the file is being written. total_rows is
+    the number of source rows, and transform an optional function applied
+    to the chunk stream before writing. Returns an ExportJob that can be
+    polled for progress.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == "DOCX" and transform is None and total_rows is not None and total_rows > DOCX_MAX_ROWS:
+        raise ValueError(f"DOCX export is limited to {DOCX_MAX_ROWS} rows; use CSV or Parquet instead.")
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    prune_exports()
+    job = ExportJob(name, fmt, total_rows, scope)
+    job.future = _executor.submit(_run, job, chunks, transform)
+    return job
+
+
+# ===== Download Server =====
+class _DownloadHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        # Only plain file names inside EXPORT_DIR are served; there is no
+        # directory listing and no path traversal.
+        name = unquote(self.path.split("?", 1)[0].lstrip("/"))
+        fmt = next((f for f, (ext, _) in EXPORT_FORMATS.items() if name.endswith(ext)), None)
+        path = os.path.join(EXPORT_DIR, name)
+        if fmt is None or name != os.path.basename(name) or not os.path.isfile(path):
+            self.send_error(404, "Export not found or expired")
+            return
+        with open(path, "rb") as f:
+            self.send_response(200)
+            self.send_header("Content-Type", EXPORT_FORMATS[fmt][1])
+            self.send_header("Content-Length", str(os.fstat(f.fileno()).st_size))
+            self.send_header("Content-Disposition", f'attachment; filename="{name}"')
+            self.end_headers()
+            shutil.copyfileobj(f, self.wfile, 1024 * 1024)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def start_download_server(host=EXPORT_HOST, port=EXPORT_PORT):
+    """Start the download server once per process.
+
+    If the port is already taken, another app process on this machine is
+    assumed to be serving the same EXPORT_DIR.
+    """
+    global _server
+    with _server_lock:
+        if _server is not None:
+            return
+        try:
+            _server = ThreadingHTTPServer((host, port), _DownloadHandler)
+        except OSError:
+            _server = False
+            return
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="export-download", daemon=True).start()
@@ -0,0 +1,343 @@
+import os
+import re
+import json
+import time
+import uuid
+import zlib
+import shutil
+import argparse
+import tempfile
+import threading
+from contextlib import contextmanager
+from collections import OrderedDict
+
+import pandas as pd
+
+# ===== Partition Settings =====
+PARTITION_DIR = "partitions"
+MANIFEST_NAME = "manifest.json"
+# Each build goes into its own version directory; this file names the one
+# readers should use, so switching layouts is a single atomic replace.
+CURRENT_NAME = "CURRENT"
+CHUNK_SIZE = 50000
+# A build lock not refreshed for this long belongs to a crashed builder.
+LOCK_TIMEOUT = 10 * 60
+REQUIRED_COLUMNS = ["Country", "State", "City", "Tourist Place"]
+
+
+def slug(name):
+    """File-name-safe form of name; empty if it has no ASCII letters or digits."""
+    return re.sub(r"[^A-Za-z0-9]+", "_", str(name)).strip("_")
+
+
+def _partition_name(name):
+    # Different names can share a slug ("St. Louis"/"St Louis", or any
+    # non-Latin name), so a checksum of the raw name keeps paths distinct.
+    checksum = zlib.crc32(str(name).encode("utf-8"))
+    return f"{slug(name) or 'partition'}_{checksum:08x}"
+
+
+def validate_shard(shard_index, shard_count):
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(f"Invalid shard {shard_index} of {shard_count}; "
+                         "expected 0 <= shard_index < shard_count.")
+
+
+def shard_of(country, shard_count):
+    """Stable shard number for a country, the same on every worker and node."""
+    return zlib.crc32(str(country).encode("utf-8")) % shard_count
+
+
+def shard_dir(out_dir, shard_index, shard_count):
+    """Layout directory for one shard, so shards sharing a disk do not collide."""
+    if shard_count == 1:
+        return out_dir
+    return f"{out_dir}_{shard_index}of{shard_count}"
+
+
+def source_signature(source):
+    """Size and modification time of the source, as recorded in the manifest."""
+    stat = os.stat(source)
+    return {"size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def current_root(out_dir=PARTITION_DIR):
+    """Directory of the version named by out_dir's CURRENT file."""
+    with open(os.path.join(out_dir, CURRENT_NAME), encoding="utf-8") as f:
+        return os.path.join(out_dir, f.read().strip())
+
+
+# ===== Building the Layout =====
+def is_current(source, out_dir=PARTITION_DIR, shard_index=0, shard_count=1):
+    """Whether out_dir holds this shard's partitions of the current source file."""
+    try:
+        with open(os.path.join(current_root(out_dir), MANIFEST_NAME), encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    return (manifest.get("source") == os.path.basename(source)
+            and manifest.get("source_signature") == source_signature(source)
+            and manifest.get("shard") == [shard_index, shard_count])
+
+
+def _lock_owner(lock_path):
+    try:
+        with open(lock_path, encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+@contextmanager
+def _build_lock(out_dir):
+    # An exclusive lock file works across processes and platforms, so only
+    # one worker or node rebuilds a shared layout at a time. The lock holds
+    # a token so a builder never removes a lock it no longer owns, and the
+    # yielded refresh() keeps it from looking stale during long builds.
+    lock_path = os.path.abspath(out_dir) + ".lock"
+    token = uuid.uuid4().hex
+    while True:
+        try:
+            fd = os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            os.write(fd, token.encode("utf-8"))
+            os.close(fd)
+            break
+        except FileExistsError:
+            owner = _lock_owner(lock_path)
+            try:
+                stale = time.time() - os.path.getmtime(lock_path) > LOCK_TIMEOUT
+            except FileNotFoundError:
+                continue
+            if stale and _lock_owner(lock_path) == owner:
+                try:
+                    os.remove(lock_path)
+                except FileNotFoundError:
+                    pass
+                continue
+            time.sleep(0.5)
+
+    def refresh():
+        if _lock_owner(lock_path) != token:
+            raise RuntimeError(f"Lost the partition build lock {lock_path}.")
+        os.utime(lock_path)
+
+    try:
+        yield refresh
+    finally:
+        if _lock_owner(lock_path) == token:
+            os.remove(lock_path)
+
+
+def ensure_partitions(source, out_dir=PARTITION_DIR, by_state=False, shard_index=0, shard_count=1):
+    """Build this shard's layout unless it is already current for source."""
+    validate_shard(shard_index, shard_count)
+    if is_current(source, out_dir, shard_index, shard_count):
+        return
+    with _build_lock(out_dir) as refresh:
+        # Another process may have finished the build while we waited.
+        if not is_current(source, out_dir, shard_index, shard_count):
+            _build(source, out_dir, by_state, CHUNK_SIZE, shard_index, shard_count, refresh)
+
+
+def build_partitions(source, out_dir=PARTITION_DIR, by_state=False, chunk_size=CHUNK_SIZE,
+                     shard_index=0, shard_count=1):
+    """Split a dataset CSV into one CSV per country (or per country and state).
+
+    The source is streamed in chunks and appended to the partition files, so
+    building never needs the whole table in memory. With shard_count > 1 only
+    the countries of shard_index are written. Each build goes into a new
+    version directory that CURRENT is switched to once it is complete, so
+    readers never see a half-written or missing layout. Returns the manifest.
+    """
+    validate_shard(shard_index, shard_count)
+    with _build_lock(out_dir) as refresh:
+        return _build(source, out_dir, by_state, chunk_size, shard_index, shard_count, refresh)
+
+
+def _build(source, out_dir, by_state, chunk_size, shard_index, shard_count, refresh):
+    os.makedirs(out_dir, exist_ok=True)
+    try:
+        previous = os.path.basename(current_root(out_dir))
+    except FileNotFoundError:
+        previous = None
+    version = f"v{time.strftime('%Y%m%d%H%M%S')}_{uuid.uuid4().hex[:8]}"
+    version_dir = os.path.join(out_dir, version)
+    try:
+        manifest = _write_partitions(source, version_dir, by_state, chunk_size,
+                                     shard_index, shard_count, refresh)
+        refresh()
+    except BaseException:
+        shutil.rmtree(version_dir, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(out_dir, f"{CURRENT_NAME}.{version}")
+    with open(pointer, "w", encoding="utf-8") as f:
+        f.write(version)
+    os.replace(pointer, os.path.join(out_dir, CURRENT_NAME))
+
+    # The previous version is kept for stores in other processes that were
+    # opened before the switch; anything older is removed.
+    for entry in os.scandir(out_dir):
+        if entry.name in (CURRENT_NAME, version, previous):
+            continue
+        if entry.is_dir():
+            shutil.rmtree(entry.path, ignore_errors=True)
+        else:
+            os.remove(entry.path)
+    return manifest
+
+
+def _write_partitions(source, out_dir, by_state, chunk_size, shard_index, shard_count, refresh):
+    os.makedirs(out_dir)
+    keys = ["Country", "State"] if by_state else ["Country"]
+    partitions = {}
+    used_paths = set()
+    columns = None
+
+    for chunk in pd.read_csv(source, chunksize=chunk_size):
+        refresh()
+        chunk = chunk.dropna(subset=REQUIRED_COLUMNS)
+        columns = columns or list(chunk.columns)
+        if shard_count > 1:
+            owned = chunk["Country"].map(lambda country: shard_of(country, shard_count) == shard_index)
+            chunk = chunk[owned]
+        for key, group in chunk.groupby(keys, sort=False):
+            key = key if isinstance(key, tuple) else (key,)
+            entry = partitions.get(key)
+            if entry is None:
+                file_name = f"{_partition_name(key[1])}.csv" if by_state else "part.csv"
+                path = os.path.join(_partition_name(key[0]), file_name)
+                if path in used_paths:
+                    path = os.path.join(_partition_name(key[0]), f"{len(partitions)}_{file_name}")
+                used_paths.add(path)
+                os.makedirs(os.path.join(out_dir, os.path.dirname(path)), exist_ok=True)
+                entry = {
+                    "country": key[0],
+                    "state": key[1] if by_state else None,
+                    "path": path,
+                    "rows": 0,
+                }
+                partitions[key] = entry
+                group.to_csv(os.path.join(out_dir, entry["path"]), index=False)
+            else:
+                group.to_csv(os.path.join(out_dir, entry["path"]), mode="a", header=False, index=False)
+            entry["rows"] += len(group)
+
+    manifest = {
+        "source": os.path.basename(source),
+        "source_signature": source_signature(source),
+        "shard": [shard_index, shard_count],
+        "by_state": by_state,
+        "columns": columns or [],
+        "partitions": sorted(partitions.values(), key=lambda p: (p["country"], p["state"] or "")),
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+# ===== Lazy Partition Store =====
+class PartitionStore:
+    """Loads country partitions on first access and keeps them in an LRU cache.
+
+    The cache is bounded by the in-memory size of the loaded DataFrames, so
+    resident memory follows the countries being browsed rather than the size
+    of the whole dataset. With shard_count > 1 the store only serves the
+    countries whose shard_of() matches shard_index, letting several workers
+    or nodes split the dataset into disjoint sets.
+    """
+
+    def __init__(self, root=PARTITION_DIR, max_bytes=256 * 1024 * 1024, shard_index=0, shard_count=1):
+        validate_shard(shard_index, shard_count)
+        # The store stays on the version that was current when it was opened,
+        # even if a rebuild switches CURRENT afterwards.
+        self.root = current_root(root)
+        self.max_bytes = max_bytes
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        with open(os.path.join(self.root, MANIFEST_NAME), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        self._by_country = {}
+        for entry in self.manifest["partitions"]:
+            if self.owns(entry["country"]):
+                self._by_country.setdefault(entry["country"], []).append(entry)
+        self._cache = OrderedDict()
+        self._cache_bytes = 0
+        self._lock = threading.Lock()
+
+    def owns(self, country):
+        return shard_of(country, self.shard_count) == self.shard_index
+
+    def countries(self):
+        return sorted(self._by_country)
+
+    def states(self, country):
+        """States of a country, read from the manifest when sub-partitioned."""
+        if self.manifest["by_state"]:
+            return sorted(entry["state"] for entry in self._entries(country))
+        return sorted(self.load(country)["State"].dropna().unique().tolist())
+
+    def rows(self, country, state=None):
+        return sum(entry["rows"] for entry in self._entries(country, state))
+
+    def paths(self, country, state=None):
+        return [os.path.join(self.root, entry["path"]) for entry in self._entries(country, state)]
+
+    def load(self, country, state=None):
+        """Return the places of a country (and state), loading partitions as needed."""
+        entries = self._entries(country, state)
+        frames = [self._load_partition(entry) for entry in entries]
+        if not frames:
+            return pd.DataFrame(columns=self.manifest["columns"])
+        df = frames[0] if len(frames) == 1 else pd.concat(frames, ignore_index=True)
+        if state is not None and not self.manifest["by_state"]:
+            df = df[df["State"] == state]
+        return df
+
+    def _entries(self, country, state=None):
+        if country not in self._by_country:
+            raise KeyError(f"Country '{country}' is not served by this partition store.")
+        entries = self._by_country[country]
+        if state is not None and self.manifest["by_state"]:
+            entries = [entry for entry in entries if entry["state"] == state]
+        return entries
+
+    def _load_partition(self, entry):
+        key = entry["path"]
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key][0]
+
+        df = pd.read_csv(os.path.join(self.root, key))
+        size = int(df.memory_usage(deep=True).sum())
+
+        with self._lock:
+            if key not in self._cache:
+                self._cache[key] = (df, size)
+                self._cache_bytes += size
+                # Always keep the partition just loaded, even if it alone is
+                # larger than the bound.
+                while self._cache_bytes > self.max_bytes and len(self._cache) > 1:
+                    _, (_, evicted) = self._cache.popitem(last=False)
+                    self._cache_bytes -= evicted
+            return self._cache[key][0]
+
+    @property
+    def cached_bytes(self):
+        return self._cache_bytes
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build the country-partitioned dataset layout.")
+    parser.add_argument("source", nargs="?", default="updated_tourist_places_dataset.csv")
+    parser.add_argument("--out", default=PARTITION_DIR)
+    parser.add_argument("--by-state", action="store_true", help="Also sub-partition each country by state")
+    parser.add_argument("--shard", type=int, default=0, help="Index of the shard to build")
+    parser.add_argument("--shards", type=int, default=1, help="Total number of shards")
+    args = parser.parse_args()
+
+    out_dir = shard_dir(args.out, args.shard, args.shards)
+    manifest = build_partitions(args.source, out_dir, by_state=args.by_state,
+                                shard_index=args.shard, shard_count=args.shards)
+    print(f"Wrote {len(manifest['partitions'])} partitions to {out_dir}")